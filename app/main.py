@@ -1,25 +1,37 @@
 # app/main.py
 import sys
 import os
+import heapq
+from pathlib import Path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
 
 from search_engine import build_vsm, weight_tfidf_standard, weight_tfidf_sublinear, rank_vsm, snippet, search_boolean, evaluate_vsm
-from boolean_ir import load_docs, build_inverted_index
+from boolean_ir import load_docs, build_inverted_index, decode_postings
 import streamlit as st
 
+# ==== CACHE INDEX ====
+# Index dan matriks bobot hanya dibangun ulang jika isi folder korpus berubah
+# (nama file / waktu modifikasi), bukan pada setiap rerun Streamlit.
+def corpus_signature(path):
+    return tuple(sorted((f.name, f.stat().st_mtime_ns) for f in Path(path).glob("*.txt")))
+
+@st.cache_resource(max_entries=1)
+def load_index(path, signature):
+    docs = load_docs(path)
+    doc_ids = list(docs.keys())
+    inverted = build_inverted_index(docs)
+    vsm = build_vsm(docs)
+    return docs, doc_ids, inverted, vsm, weight_tfidf_standard(vsm), weight_tfidf_sublinear(vsm)
+
 # ==== STREAMLIT INTERFACE ====
 st.title("Mini Search Engine (UTS)")
 
-docs = load_docs("data/processed")
+DATA_PATH = "data/processed"
+docs, doc_ids, inverted, vsm, wm_std, wm_sub = load_index(DATA_PATH, corpus_signature(DATA_PATH))
 if not docs:
     st.error("Folder data/processed kosong!")
     st.stop()
 
-inverted = build_inverted_index(docs)
-vsm = build_vsm(docs)
-wm_std = weight_tfidf_standard(vsm)
-wm_sub = weight_tfidf_sublinear(vsm)
-
 query = st.text_input("Masukkan query:")
 
 scheme = st.selectbox("Skema pencarian", ["Boolean", "VSM TF-IDF", "VSM Sublinear"])
@@ -28,8 +40,8 @@ top_k = st.slider("Top-k dokumen", 1, 10, 5)
 if query:
     st.subheader("Hasil Pencarian")
     if scheme=="Boolean":
-        res = search_boolean(query, inverted)
-        res_sorted = sorted(res)[:top_k]  # Batasi sesuai top_k
+        res = search_boolean(query, inverted, doc_ids)
+        res_sorted = heapq.nsmallest(top_k, res)  # Batasi sesuai top_k
         table = [[i+1, doc, snippet(docs[doc])] for i, doc in enumerate(res_sorted)]
         st.table(table)
 
@@ -39,7 +51,11 @@ if query:
         table = [[i+1, doc, f"{score:.4f}", snippet(docs[doc])] for i,(doc,score) in enumerate(res)]
         st.table(table)
 
-    gold_set = set(f for f in docs if any(w in " ".join(docs[f]).lower() for w in query.lower().split()))
+    # Gold set = dokumen yang mengandung minimal satu kata query (lookup inverted index)
+    gold_mask = 0
+    for w in query.lower().split():
+        gold_mask |= inverted.get(w, 0)
+    gold_set = decode_postings(gold_mask, doc_ids)
     ev_res = [(d,1) for d in res] if scheme=="Boolean" else res
     p,r,f,mapk,ndcg = evaluate_vsm(ev_res, gold_set)
     st.subheader("Evaluasi")
@@ -1,6 +1,13 @@
 from collections import defaultdict
 from pathlib import Path
 import re
+import sys
+
+
+# Pola tokenisasi query Boolean & daftar operator (dikompilasi sekali saja)
+_QRE = re.compile(r'\bnot\b|\band\b|\bor\b|[\w-]+')
+_OPS = {'and', 'or', 'not'}
+_PREC = {"NOT": 3, "AND": 2, "OR": 1}
 
 
 # ============================================================
@@ -9,12 +16,13 @@ import re
 def load_docs(path="data/processed"):
     """
     Membaca semua file teks hasil preprocessing dari folder 'data/processed'.
-    Setiap dokumen disimpan sebagai list token.
+    Setiap dokumen disimpan sebagai tuple token; token di-intern (sys.intern)
+    agar string yang sama berbagi satu objek sehingga hashing/lookup lebih cepat.
 
     Output:
     -------
     docs : dict
-        { nama_file.txt : [token1, token2, ...] }
+        { nama_file.txt : (token1, token2, ...) }
     """
     docs = {}
     p = Path(path)
@@ -23,28 +31,48 @@ def load_docs(path="data/processed"):
         return docs
 
     for f in p.glob("*.txt"):
-        docs[f.name] = f.read_text(encoding="utf-8").split()
+        docs[f.name] = tuple(sys.intern(w) for w in f.read_text(encoding="utf-8").split())
 
     print(f"{len(docs)} dokumen dimuat.")
     return docs
 
 
+# ============================================================
+# === [2] HIMPUNAN TERM UNIK PER DOKUMEN =====================
+# ============================================================
+def build_doc_term_sets(docs):
+    """
+    Menghitung himpunan term unik (frozenset) untuk setiap dokumen sekali saja,
+    agar bisa dipakai bersama oleh incidence matrix dan inverted index.
+
+    Output:
+    -------
+    doc_terms : dict
+        { nama_file.txt : frozenset({term1, term2, ...}) }
+    """
+    return {doc: frozenset(toks) for doc, toks in docs.items()}
+
+
 # ============================================================
 # === [2A] MEMBANGUN INCIDENCE MATRIX (SPARSE) ===============
 # ============================================================
-def build_incidence_matrix(docs):
+def build_incidence_matrix(docs, doc_terms=None):
     """
     Membangun *incidence matrix* (versi sparse).
     Tiap term menyimpan himpunan dokumen yang mengandung term tersebut.
+    `doc_terms` (hasil `build_doc_term_sets`) boleh diberikan agar
+    deduplikasi token tidak diulang.
 
     Output:
     -------
     matrix : dict
         { term : {dok1, dok2, ...} }
     """
+    if doc_terms is None:
+        doc_terms = build_doc_term_sets(docs)
     matrix = defaultdict(set)
-    for doc, toks in docs.items():
-        for term in set(toks):
+    for doc, terms in doc_terms.items():
+        for term in terms:
             matrix[term].add(doc)
     return dict(matrix)
 
@@ -52,27 +80,66 @@ def build_incidence_matrix(docs):
 # ============================================================
 # === [2B] MEMBANGUN INVERTED INDEX ==========================
 # ============================================================
-def build_inverted_index(docs):
+def build_inverted_index(docs, doc_terms=None):
     """
     Membangun inverted index (struktur pencarian cepat untuk Boolean retrieval).
-    Sama seperti incidence matrix, tapi lebih ringkas untuk lookup.
+    Setiap dokumen diberi ID integer sesuai urutannya di `docs` (0..N-1),
+    dan posting list tiap term disimpan sebagai bitmap (int Python):
+    bit ke-i bernilai 1 jika dokumen ke-i mengandung term tersebut.
+    `doc_terms` (hasil `build_doc_term_sets`) boleh diberikan agar
+    deduplikasi token tidak diulang.
 
     Output:
     -------
     inverted : dict
-        { term : {dok1, dok2, ...} }
+        { term : bitmap_dokumen }
     """
-    inverted = defaultdict(set)
-    for doc, toks in docs.items():
-        for t in set(toks):
-            inverted[t].add(doc)
+    if doc_terms is None:
+        doc_terms = build_doc_term_sets(docs)
+    inverted = defaultdict(int)
+    for doc_id, doc in enumerate(docs):
+        bit = 1 << doc_id
+        for t in doc_terms[doc]:
+            inverted[t] |= bit
     return dict(inverted)
 
 
+def decode_postings(mask, doc_ids):
+    """
+    Mengubah bitmap posting kembali menjadi himpunan nama dokumen.
+    """
+    result = set()
+    while mask:
+        low = mask & -mask
+        result.add(doc_ids[low.bit_length() - 1])
+        mask ^= low
+    return result
+
+
 # ============================================================
 # === [3] BOOLEAN QUERY PARSER (dengan perbaikan NOT) ========
 # ============================================================
-def eval_boolean(query, inverted_index):
+def _intersect_all(operands):
+    """
+    Mengiris beberapa bitmap posting sekaligus (rantai AND).
+    Bitmap diurutkan dari yang paling sedikit dokumennya, dan proses
+    berhenti lebih awal jika hasil irisan sudah kosong.
+    """
+    operands = sorted(operands, key=int.bit_count)
+    result = operands[0]
+    for other in operands[1:]:
+        if not result:
+            break
+        result &= other
+    return result
+
+
+def _resolve(operand):
+    """Menyelesaikan rantai AND yang masih tertunda (list) menjadi satu bitmap."""
+    return _intersect_all(operand) if isinstance(operand, list) else operand
+
+
+def eval_boolean(query, inverted_index, doc_ids):
     """
     Mengevaluasi query Boolean sederhana (tanpa kurung).
     Mendukung operator: AND, OR, NOT.
@@ -85,20 +152,21 @@ def eval_boolean(query, inverted_index):
 
     Jika pengguna mengetik "NOT bandung", maka sistem akan
     mengembalikan semua dokumen yang *tidak* mengandung kata 'bandung'.
+
+    Operasi dilakukan pada bitmap dokumen (AND = &, OR = |, NOT = XOR dengan
+    gabungan semua posting), lalu bitmap dipetakan kembali ke nama file
+    `doc_ids` hanya pada saat output. Operand AND yang berurutan dikumpulkan
+    dulu, lalu diiris mulai dari posting list terpendek.
     """
     # --- Normalisasi & tokenisasi query ---
     q = query.lower().strip()
-    tokens = re.findall(r'\bnot\b|\band\b|\bor\b|[\w-]+', q)
-    tokens = [t.upper() if t in ('and', 'or', 'not') else t for t in tokens]
+    tokens = [t.upper() if t in _OPS else t for t in _QRE.findall(q)]
 
-    # --- Prioritas operator ---
-    prec = {"NOT": 3, "AND": 2, "OR": 1}
+    # --- Infix → Postfix (Reverse Polish Notation), prioritas operator: _PREC ---
     output, stack = [], []
-
-    # --- Infix → Postfix (Reverse Polish Notation) ---
     for tok in tokens:
-        if tok in ("AND", "OR", "NOT"):
-            while stack and prec.get(stack[-1], 0) >= prec[tok]:
+        if tok in _PREC:
+            while stack and _PREC.get(stack[-1], 0) >= _PREC[tok]:
                 output.append(stack.pop())
             stack.append(tok)
         else:
@@ -107,7 +175,12 @@ def eval_boolean(query, inverted_index):
         output.append(stack.pop())
 
     # --- Evaluasi Postfix ---
-    all_docs = set().union(*inverted_index.values()) if inverted_index else set()
+    # Semesta NOT = gabungan semua posting list (dokumen tanpa token tidak ikut),
+    # hanya dihitung jika query memang memakai NOT
+    all_docs = 0
+    if "NOT" in output:
+        for mask in inverted_index.values():
+            all_docs |= mask
     eval_stack = []
 
     for tok in output:
@@ -115,22 +188,26 @@ def eval_boolean(query, inverted_index):
             # Jika query diawali NOT, anggap operand kiri = semua dokumen
             if not eval_stack:
                 eval_stack.append(all_docs)
-            A = eval_stack.pop()
-            eval_stack.append(all_docs - A)
+            A = _resolve(eval_stack.pop())
+            eval_stack.append(all_docs ^ A)
         elif tok == "AND":
+            # Tunda irisan: kumpulkan semua operand dalam rantai AND
             if len(eval_stack) >= 2:
                 B = eval_stack.pop()
                 A = eval_stack.pop()
-                eval_stack.append(A & B)
+                group = A if isinstance(A, list) else [A]
+                group += B if isinstance(B, list) else [B]
+                eval_stack.append(group)
         elif tok == "OR":
             if len(eval_stack) >= 2:
-                B = eval_stack.pop()
-                A = eval_stack.pop()
+                B = _resolve(eval_stack.pop())
+                A = _resolve(eval_stack.pop())
                 eval_stack.append(A | B)
         else:
-            eval_stack.append(inverted_index.get(tok, set()))
+            eval_stack.append(inverted_index.get(tok, 0))
 
-    return eval_stack[-1] if eval_stack else set()
+    result = _resolve(eval_stack[-1]) if eval_stack else 0
+    return decode_postings(result, doc_ids)
 
 
 # ============================================================
@@ -183,8 +260,10 @@ if __name__ == "__main__":
         exit()
 
     # --- Step 2: Bangun struktur index ---
-    inverted = build_inverted_index(docs)
-    incidence = build_incidence_matrix(docs)
+    doc_ids = list(docs.keys())
+    doc_terms = build_doc_term_sets(docs)
+    inverted = build_inverted_index(docs, doc_terms)
+    incidence = build_incidence_matrix(docs, doc_terms)
 
     print("\n=== BOOLEAN RETRIEVAL – UJI TUGAS STKI ===")
 
@@ -200,7 +279,7 @@ if __name__ == "__main__":
         print("\n----------------------------------------------------")
         print(f"QUERY : {query}")
 
-        result = eval_boolean(query, inverted)
+        result = eval_boolean(query, inverted, doc_ids)
         print(f"Hasil Dokumen : {sorted(result)}")
 
         # Penjelasan operasi Boolean
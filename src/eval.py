@@ -1,10 +1,13 @@
 import os
 import re
 import math
-from collections import Counter, defaultdict
+from collections import Counter
 import numpy as np
-from scipy.sparse import csr_matrix
-from numpy.linalg import norm
+from scipy.sparse import csr_matrix, diags, vstack
+from sklearn.preprocessing import normalize
+
+# Regex tokenisasi untuk vectorize_query (dikompilasi sekali, bukan per query)
+_TOKEN_RE = re.compile(r"\b\w+\b")
 
 
 # ==========================================================
@@ -25,10 +28,12 @@ def load_processed_docs(path="data/processed"):
         print("Folder tidak ditemukan:", path)
         return docs
 
-    for filename in os.listdir(path):
-        if filename.endswith(".txt"):
-            with open(os.path.join(path, filename), "r", encoding="utf-8") as f:
-                docs[filename] = f.read().split()
+    # scandir sudah membawa tipe entri, jadi tidak perlu os.path.join/stat terpisah
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.name.endswith(".txt") and entry.is_file():
+                with open(entry.path, "r", encoding="utf-8") as f:
+                    docs[entry.name] = f.read().split()
     return docs
 
 
@@ -41,9 +46,10 @@ def build_tfidf_sparse(docs):
 
     Tahapan:
     --------
-    1. Hitung Document Frequency (df)
-    2. Hitung Inverse Document Frequency (idf)
-    3. Hitung TF-IDF untuk setiap term di setiap dokumen
+    1. Petakan token ke ID integer (doc_id, term_id)
+    2. Hitung TF mentah sebagai matriks sparse, lalu Document Frequency (df)
+       & Inverse Document Frequency (idf) dengan operasi array NumPy
+    3. Normalisasi TF per baris dengan max_tf, lalu kalikan dengan idf
     4. Simpan ke dalam bentuk matriks sparse
 
     Output:
@@ -51,39 +57,39 @@ def build_tfidf_sparse(docs):
     - doc_ids      : daftar nama dokumen
     - vocab        : daftar term unik
     - term_index   : posisi indeks tiap term dalam vektor
-    - idf          : bobot idf per term
+    - idf          : array bobot idf, diindeks sesuai term_index
     - tfidf_matrix : matriks TF-IDF bentuk sparse
     """
     doc_ids = list(docs.keys())
     N = len(doc_ids)
 
-    # --- Hitung Document Frequency (DF) ---
-    df = defaultdict(int)
-    for tokens in docs.values():
-        for term in set(tokens):
-            df[term] += 1
-
-    # --- Hitung Inverse Document Frequency (IDF) ---
-    idf = {term: math.log10(N / df[term]) for term in df}
-
     # --- Buat Vocabulary dan Mapping Index ---
-    vocab = sorted(idf.keys())
+    vocab = sorted(set().union(*docs.values()))
     term_index = {t: i for i, t in enumerate(vocab)}
+    V = len(vocab)
+
+    # --- Ubah seluruh token menjadi pasangan (doc_id, term_id) ---
+    lengths = np.fromiter((len(docs[doc]) for doc in doc_ids), dtype=np.int64, count=N)
+    term_arr = np.fromiter((term_index[t] for doc in doc_ids for t in docs[doc]),
+                           dtype=np.int32, count=int(lengths.sum()))
+    doc_arr = np.repeat(np.arange(N, dtype=np.int32), lengths)
 
-    # --- Hitung TF-IDF tiap dokumen ---
-    rows, cols, values = [], [], []
+    # --- Hitung TF: frekuensi tiap pasangan (doc_id, term_id) unik ---
+    pair_keys, counts = np.unique(doc_arr.astype(np.int64) * V + term_arr, return_counts=True)
+    rows, cols = pair_keys // V, pair_keys % V
+    tf_csr = csr_matrix((counts.astype(np.float64), (rows, cols)), shape=(N, V))
 
-    for d_i, doc in enumerate(doc_ids):
-        tf = Counter(docs[doc])
-        max_tf = max(tf.values())
-        for term, freq in tf.items():
-            rows.append(d_i)
-            cols.append(term_index[term])
-            values.append((freq / max_tf) * idf[term])
+    # --- Hitung Document Frequency (DF) & Inverse Document Frequency (IDF) ---
+    # DF = jumlah entri non-nol tiap kolom matriks TF
+    df = np.diff(tf_csr.tocsc().indptr).astype(np.float64)
+    idf = np.log10(N / df)
 
-    # --- Bentuk Matriks Sparse ---
-    tfidf_matrix = csr_matrix((values, (rows, cols)),
-                              shape=(len(doc_ids), len(vocab)))
+    # --- Normalisasi TF per baris dengan max_tf tiap dokumen ---
+    max_tf = tf_csr.max(axis=1).toarray().ravel()
+    tf_norm = diags(1.0 / np.where(max_tf > 0, max_tf, 1)) @ tf_csr
+
+    # --- Bentuk Matriks Sparse TF-IDF ---
+    tfidf_matrix = tf_norm.multiply(idf).tocsr()
 
     return doc_ids, vocab, term_index, idf, tfidf_matrix
 
@@ -102,29 +108,28 @@ def vectorize_query(query, idf, term_index, vocab_size):
     3. Kalikan dengan IDF term yang ada di vocab
     4. Hasil berupa vektor sparse berdimensi sama seperti dokumen
     """
-    tokens = re.findall(r"\b\w+\b", query.lower())
+    tokens = _TOKEN_RE.findall(query.lower())
     tf = Counter(tokens)
 
-    rows, cols, values = [], [], []
     if not tf:
         return csr_matrix((1, vocab_size)), tokens
 
     max_tf = max(tf.values())
 
-    for term, freq in tf.items():
-        if term in term_index:
-            rows.append(0)
-            cols.append(term_index[term])
-            values.append((freq / max_tf) * idf[term])
+    # Ambil ID term & frekuensi term yang ada di vocab, lalu kalikan IDF sekaligus
+    known = [(term_index[term], freq) for term, freq in tf.items() if term in term_index]
+    cols = np.array([c for c, _ in known], dtype=np.int32)
+    freqs = np.array([f for _, f in known], dtype=np.float64)
+    values = (freqs / max_tf) * idf[cols]
 
-    q_vec = csr_matrix((values, (rows, cols)), shape=(1, vocab_size))
+    q_vec = csr_matrix((values, (np.zeros_like(cols), cols)), shape=(1, vocab_size))
     return q_vec, tokens
 
 
 # ==========================================================
 # [4] COSINE SIMILARITY (VSM RETRIEVAL)
 # ==========================================================
-def cosine_similarity_sparse(q_vec, d_matrix):
+def cosine_similarity_sparse(q_vec, d_matrix_norm):
     """
     Menghitung Cosine Similarity antara query dan setiap dokumen.
 
@@ -132,18 +137,30 @@ def cosine_similarity_sparse(q_vec, d_matrix):
     -------
     sim(q, d) = (q ⋅ d) / (|q| * |d|)
 
+    Baris `d_matrix_norm` sudah dinormalisasi L2 sejak indexing,
+    sehingga cukup menormalisasi query lalu menghitung dot product
+    ke semua dokumen lewat satu perkalian matriks sparse.
+
     Output:
     -------
-    scores : list nilai kesamaan cosine untuk setiap dokumen
+    scores : array nilai kesamaan cosine untuk setiap dokumen
     """
-    scores = []
-    q_norm = norm(q_vec.toarray())
-    for i in range(d_matrix.shape[0]):
-        d_vec = d_matrix.getrow(i)
-        dot = q_vec.multiply(d_vec).sum()
-        d_norm = norm(d_vec.toarray())
-        scores.append(dot / (q_norm * d_norm) if q_norm and d_norm else 0)
-    return scores
+    q_unit = normalize(q_vec, norm="l2")
+    return (d_matrix_norm @ q_unit.T).toarray().ravel()
+
+
+def cosine_similarity_batch(q_matrix, d_matrix_norm):
+    """
+    Versi batch dari `cosine_similarity_sparse`: beberapa query (satu baris
+    per query pada `q_matrix`) dihitung sekaligus dalam satu perkalian
+    matriks sparse, sehingga korpus cukup dilalui satu kali.
+
+    Output:
+    -------
+    scores : array berukuran (jumlah dokumen × jumlah query)
+    """
+    q_unit = normalize(q_matrix, norm="l2")
+    return (d_matrix_norm @ q_unit.T).toarray()
 
 
 # ==========================================================
@@ -211,7 +228,7 @@ def main():
     1. Load dokumen hasil preprocessing
     2. Bangun representasi TF-IDF (dokumen)
     3. Definisikan gold standard (dokumen relevan per query)
-    4. Hitung kesamaan cosine antara query dan dokumen
+    4. Hitung kesamaan cosine antara semua query dan dokumen (batch)
     5. Evaluasi dengan metrik: Precision@K, MAP@K, nDCG@K
     """
     print("=== Evaluasi Sistem VSM (TF-IDF) ===")
@@ -226,35 +243,43 @@ def main():
 
     # --- Step 2: Bangun TF-IDF Sparse Matrix ---
     doc_ids, vocab, term_index, idf, tfidf = build_tfidf_sparse(docs)
+    # Normalisasi L2 tiap baris dokumen sekali saja (cosine = dot product)
+    tfidf_norm = normalize(tfidf, norm="l2", axis=1)
 
     # --- Step 3: Tentukan Gold Standard untuk evaluasi ---
-    file_list = set(doc_ids)
+    # Teks tiap dokumen cukup digabung & di-lowercase sekali untuk semua query
+    doc_text_lower = {f: " ".join(toks).lower() for f, toks in docs.items()}
     gold_sets = {
         "universitas":
-            set(f for f in file_list if "universitas" in " ".join(docs[f]).lower()),
+            set(f for f, text in doc_text_lower.items() if "universitas" in text),
 
         "fasilitas":
-            set(f for f in file_list if "fasilitas" in " ".join(docs[f]).lower()),
+            set(f for f, text in doc_text_lower.items() if "fasilitas" in text),
 
         "fakultas teknik":
-            set(f for f in file_list if "fakultas" in " ".join(docs[f]).lower()
-                and "teknik" in " ".join(docs[f]).lower()),
+            set(f for f, text in doc_text_lower.items() if "fakultas" in text
+                and "teknik" in text),
     }
 
     k = 5  # ambil 5 hasil teratas
     sum_p = sum_ap = sum_ndcg = 0
 
+    # --- Step 4: Vektorisasi semua query & hitung Cosine Similarity sekaligus ---
+    queries = list(gold_sets)
+    q_matrix = vstack([vectorize_query(q, idf, term_index, len(vocab))[0] for q in queries])
+    all_scores = cosine_similarity_batch(q_matrix, tfidf_norm)
+
     print("\n=== HASIL PER QUERY ===")
-    for query, gold in gold_sets.items():
+    for j, query in enumerate(queries):
+        gold = gold_sets[query]
         print(f"\n Query: {query}")
+        scores = all_scores[:, j]
 
-        # --- Step 4: Vektorisasi dan Hitung Cosine Similarity ---
-        q_vec, _ = vectorize_query(query, idf, term_index, len(vocab))
-        scores = cosine_similarity_sparse(q_vec, tfidf)
-
-        # --- Urutkan hasil berdasarkan skor kesamaan ---
-        ranked = sorted(zip(doc_ids, scores), key=lambda x: x[1], reverse=True)
-        top_k = ranked[:k]
+        # --- Ambil K hasil teratas (argpartition O(N), lalu urutkan K saja) ---
+        kk = min(k, len(scores))
+        idx = np.argpartition(-scores, kk - 1)[:kk]
+        idx = idx[np.argsort(-scores[idx], kind="stable")]
+        top_k = [(doc_ids[i], scores[i]) for i in idx]
 
         # --- Tampilkan hasil pencarian ---
         for rank, (doc, score) in enumerate(top_k, 1):
@@ -1,5 +1,6 @@
 import re
 import os
+from concurrent.futures import ThreadPoolExecutor
 import matplotlib
 matplotlib.use("Agg")  # Mode non-interaktif agar aman dijalankan otomatis
 import matplotlib.pyplot as plt
@@ -61,8 +62,17 @@ def preprocess_text(text: str):
 # ==========================================================
 # === [4] FUNGSI UTAMA UNTUK MEMPROSES SEMUA FILE
 # ==========================================================
+# Membaca satu file mentah dan menjalankan `preprocess_text()` padanya.
+# Dipanggil secara paralel oleh `process_all_files()`.
+def _process_one(file):
+    raw_text = file.read_text(encoding="utf-8", errors="ignore")
+    return file.name, preprocess_text(raw_text)
+
+
 # Fungsi ini akan membaca semua file .txt di folder `data/raw`,
 # lalu menjalankan fungsi `preprocess_text()` untuk setiap dokumen.
+# Pembacaan & tokenisasi tiap file saling independen, sehingga dijalankan
+# paralel dengan ThreadPoolExecutor (urutan hasil tetap sama dengan `files`).
 # Hasilnya disimpan ke folder `data/processed` dan dibuat grafik distribusi panjang dokumen.
 def process_all_files():
     files = list(RAW_PATH.glob("*.txt"))
@@ -72,14 +82,15 @@ def process_all_files():
 
     doc_lengths = {}
 
-    # Proses setiap file
-    for file in files:
-        raw_text = file.read_text(encoding="utf-8", errors="ignore")
-        tokens = preprocess_text(raw_text)
-        doc_lengths[file.name] = len(tokens)
+    # Proses semua file secara paralel
+    with ThreadPoolExecutor() as ex:
+        results = list(ex.map(_process_one, files))
+
+    for name, tokens in results:
+        doc_lengths[name] = len(tokens)
 
         # Simpan hasil tokenisasi ke folder processed
-        out_path = PROCESSED_PATH / file.name
+        out_path = PROCESSED_PATH / name
         out_path.write_text(" ".join(tokens), encoding="utf-8")
 
     # ==========================================================
@@ -1,6 +1,8 @@
-import math
 import re
-from collections import Counter, defaultdict
+from collections import Counter
+from functools import lru_cache
+import numpy as np
+from scipy.sparse import csr_matrix, diags
 from boolean_ir import load_docs, build_inverted_index, eval_boolean, precision_recall
 from tabulate import tabulate  # pip install tabulate
 from pathlib import Path
@@ -29,10 +31,17 @@ except:
     ps = PorterStemmer()
     STOPWORDS = set(stopwords.words("english"))
 
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9\s]")
+
+# Stemming Porter cukup mahal, jadi setiap token unik hanya di-stem sekali
+@lru_cache(maxsize=None)
+def _stem(word):
+    return ps.stem(word)
+
 def preprocess(text):
     text = text.lower()
-    text = re.sub(r"[^a-z0-9\s]", " ", text)
-    tokens = [ps.stem(w) for w in text.split() if w not in STOPWORDS]
+    text = _NON_ALNUM_RE.sub(" ", text)
+    tokens = [_stem(w) for w in text.split() if w not in STOPWORDS]
     return tokens
 
 
@@ -41,18 +50,38 @@ def preprocess(text):
 # ==========================================================
 # Fungsi ini menghitung TF (term frequency), DF (document frequency),
 # dan IDF (inverse document frequency) dari seluruh dokumen.
+# TF disimpan sebagai matriks sparse CSR (baris = dokumen, kolom = term),
+# sedangkan DF dan IDF disimpan sebagai array NumPy yang diindeks oleh term_index.
+# Salinan CSC dari TF berfungsi sebagai inverted index atas term hasil stemming.
 # Rumus IDF yang digunakan: log((N+1)/(df+1)) + 1 untuk menghindari pembagian 0.
 def build_vsm(docs):
-    tf = {}
-    df = Counter()
-    for doc_id, text in docs.items():
-        tokens = preprocess(" ".join(text)) if isinstance(text, list) else preprocess(text)
-        tf[doc_id] = Counter(tokens)
-        for term in set(tokens):
-            df[term] += 1
+    doc_ids = list(docs.keys())
+    doc_tokens = {doc_id: preprocess(" ".join(text)) if isinstance(text, (list, tuple)) else preprocess(text)
+                  for doc_id, text in docs.items()}
+
+    vocab = sorted(set().union(*doc_tokens.values()))
+    term_index = {t: i for i, t in enumerate(vocab)}
+
+    # TF tiap dokumen: ubah token ke ID term (int32), lalu hitung dengan np.unique
+    indptr, indices, data = [0], [np.empty(0, dtype=np.int32)], [np.empty(0, dtype=np.int64)]
+    for doc_id in doc_ids:
+        tokens = doc_tokens[doc_id]
+        ids = np.fromiter((term_index[t] for t in tokens), dtype=np.int32, count=len(tokens))
+        terms, counts = np.unique(ids, return_counts=True)
+        indptr.append(indptr[-1] + terms.size)
+        indices.append(terms)
+        data.append(counts)
+    tf = csr_matrix((np.concatenate(data).astype(np.float64), np.concatenate(indices), indptr),
+                    shape=(len(doc_ids), len(vocab)))
+
     N = len(docs)
-    idf = {t: math.log((N + 1) / (df[t] + 1)) + 1 for t in df}
-    return {"tf": tf, "df": df, "idf": idf, "docs": docs}
+    df = np.bincount(tf.indices, minlength=len(vocab))
+    idf = np.log((N + 1) / (df + 1)) + 1
+    # Posting list per term (hasil stemming) = kolom matriks TF dalam format CSC
+    postings = tf.tocsc()
+    return {"tf": tf, "df": df, "idf": idf, "vocab": vocab, "term_index": term_index,
+            "postings": postings, "doc_ids": doc_ids,
+            "doc_index": {d: i for i, d in enumerate(doc_ids)}, "docs": docs}
 
 
 # ==========================================================
@@ -62,13 +91,30 @@ def build_vsm(docs):
 #  (a) Standard TF-IDF   → w = tf * idf
 #  (b) Sublinear TF-IDF  → w = (1 + log(tf)) * idf
 # Sublinear TF-IDF digunakan untuk meredam pengaruh kata dengan frekuensi sangat tinggi.
+# Hasilnya berupa matriks sparse CSR (dokumen × term) dengan urutan baris = vsm["doc_ids"].
+# IDF dikalikan sebagai matriks diagonal agar hasilnya tetap CSR.
+# Matriks bobot disimpan ringkas (SoA ala CSR): indptr & indices int32, data float32,
+# sehingga scoring menelusuri array kontigu berukuran separuh dari float64.
+# Norma L2 tiap dokumen dihitung sekali di sini dan disimpan sebagai atribut
+# wm._doc_norms (beserta batas atas bobot per term, wm._term_ub), karena bobot
+# dokumen tidak berubah setelah indexing.
 def weight_tfidf_standard(vsm):
-    return {doc: {term: freq * vsm["idf"].get(term, 0) for term, freq in terms.items()}
-            for doc, terms in vsm["tf"].items()}
+    return with_doc_norms((vsm["tf"] @ diags(vsm["idf"])).astype(np.float32))
 
 def weight_tfidf_sublinear(vsm):
-    return {doc: {term: (1 + math.log(freq)) * vsm["idf"].get(term, 0) for term, freq in terms.items()}
-            for doc, terms in vsm["tf"].items()}
+    # TF sublinear dihitung langsung pada array .data (hanya entri non-nol)
+    tf_sub = vsm["tf"].copy()
+    np.log(tf_sub.data, out=tf_sub.data)
+    tf_sub.data += 1
+    return with_doc_norms((tf_sub @ diags(vsm["idf"])).astype(np.float32))
+
+def with_doc_norms(wm):
+    wm._doc_norms = np.sqrt(np.asarray(wm.multiply(wm).sum(axis=1, dtype=np.float64)).ravel())
+    # Batas atas bobot ternormalisasi tiap term (max_d w[d,t]/||d||), untuk pruning di rank_vsm
+    inv = np.divide(1, wm._doc_norms, out=np.zeros_like(wm._doc_norms), where=wm._doc_norms > 0)
+    wm._term_ub = ((diags(inv) @ wm).max(axis=0).toarray().ravel()
+                   if wm.shape[0] else np.zeros(wm.shape[1]))
+    return wm
 
 
 # ==========================================================
@@ -76,30 +122,65 @@ def weight_tfidf_sublinear(vsm):
 # ==========================================================
 # Fungsi ini melakukan pencarian dengan Vector Space Model (VSM):
 # - Query diproses sama seperti dokumen
-# - Setiap dokumen dihitung skor cosine similarity terhadap query
+# - Hanya dokumen yang memuat minimal satu term query (dari vsm["postings"]) yang dinilai
+# - Term dengan sumbangan maksimum terlalu kecil untuk mengubah top-k dilewati (MaxScore)
+# - Skor cosine similarity kandidat dihitung sekaligus (wm[kandidat] @ q_vec)
 # - Hasil diurutkan dari skor tertinggi ke terendah
 def rank_vsm(query, vsm, wm, scheme="tfidf", top_k=5):
-    q_tokens = preprocess(query)
-    q_tf = Counter(q_tokens)
+    term_index = vsm["term_index"]
+    q_tf = Counter(t for t in preprocess(query) if t in term_index)
+    if not q_tf:
+        return []
 
     # Pilih metode pembobotan query (standard / sublinear)
-    q_vec = {t: (1 + math.log(f)) * vsm["idf"].get(t, 0) if scheme=="sublinear" else f * vsm["idf"].get(t,0)
-             for t,f in q_tf.items()}
-
-    doc_scores = []
-    for doc, weights in wm.items():
-        dot = sum(weights[t] * q_vec[t] for t in q_vec if t in weights)
-        d_norm = sum(w**2 for w in weights.values())
-        q_norm = sum(wq**2 for wq in q_vec.values())
-        if d_norm==0 or q_norm==0: 
-            continue
-        score = dot / math.sqrt(d_norm * q_norm)
-        if score > 0:
-            doc_scores.append((doc, score))
-
-    # Urutkan berdasarkan skor tertinggi
-    doc_scores.sort(key=lambda x: x[1], reverse=True)
-    return doc_scores[:top_k]
+    cols = [term_index[t] for t in q_tf]
+    freqs = np.fromiter(q_tf.values(), dtype=np.float64, count=len(q_tf))
+    q_vec = np.zeros(len(vsm["vocab"]))
+    q_vec[cols] = (1 + np.log(freqs) if scheme=="sublinear" else freqs) * vsm["idf"][cols]
+
+    # Norma dokumen & batas atas bobot per term diambil dari cache (lihat with_doc_norms)
+    if getattr(wm, "_term_ub", None) is None:
+        with_doc_norms(wm)
+    # Norma query cukup dari bobot term query (entri lain bernilai 0)
+    q_norm = np.linalg.norm(q_vec[cols])
+
+    postings = vsm["postings"]
+
+    def posting(c):
+        return postings.indices[postings.indptr[c]:postings.indptr[c + 1]]
+
+    def score(cands):
+        denom = wm._doc_norms[cands] * q_norm
+        dots = wm[cands] @ q_vec
+        return np.divide(dots, denom, out=np.zeros_like(dots), where=denom > 0)
+
+    # Pruning ala MaxScore: sumbangan maksimum term t ke skor cosine adalah
+    # q_w[t] * max_d(w[d,t]/||d||) / ||q||. Skor awal dokumen pada posting term
+    # dengan batas terbesar memberi ambang (skor ke-k); term dengan total batas
+    # di bawah ambang dilewati, karena dokumen yang hanya memuat term tersebut
+    # tidak mungkin masuk top-k.
+    if top_k > 0 and len(cols) > 1:
+        bounds = q_vec[cols] * wm._term_ub[cols] / q_norm
+        order = np.argsort(bounds)
+        seed = posting(cols[order[-1]])
+        if seed.size >= top_k:
+            theta = np.partition(score(seed), seed.size - top_k)[seed.size - top_k]
+            n_skip = np.count_nonzero(np.cumsum(bounds[order]) * (1 + 1e-9) < theta)
+            cols = [cols[i] for i in order[n_skip:]]
+
+    # Kandidat = gabungan posting list term query; dokumen lain pasti bernilai 0
+    candidates = np.unique(np.concatenate([posting(c) for c in cols]))
+    if candidates.size == 0:
+        return []
+    scores = score(candidates)
+
+    # Ambil top-k dengan argpartition (O(N)), lalu urutkan k hasil teratas saja
+    kk = min(top_k, len(scores))
+    if kk <= 0:
+        return []
+    idx = np.argpartition(-scores, kk - 1)[:kk]
+    idx = idx[np.argsort(-scores[idx], kind="stable")]
+    return [(vsm["doc_ids"][candidates[i]], float(scores[i])) for i in idx if scores[i] > 0]
 
 
 # ==========================================================
@@ -108,7 +189,7 @@ def rank_vsm(query, vsm, wm, scheme="tfidf", top_k=5):
 # Digunakan untuk menampilkan potongan kecil teks hasil pencarian,
 # agar pengguna bisa melihat konteks dokumen tanpa membuka seluruh isi.
 def snippet(text, length=80):
-    txt = " ".join(text) if isinstance(text, list) else text
+    txt = " ".join(text) if isinstance(text, (list, tuple)) else text
     txt = txt.replace("\n"," ")
     return txt[:length]+"..." if len(txt)>length else txt
 
@@ -119,9 +200,10 @@ def snippet(text, length=80):
 # Fungsi ini menampilkan kata-kata yang memiliki bobot tertinggi dalam dokumen
 # berdasarkan model TF-IDF, untuk keperluan interpretasi.
 def explain_terms(doc, vsm, wm, top_n=3):
-    if doc not in wm: return []
-    weighted = wm[doc]
-    return sorted(weighted.items(), key=lambda x:x[1], reverse=True)[:top_n]
+    if doc not in vsm["doc_index"]: return []
+    row = wm.getrow(vsm["doc_index"][doc])
+    weighted = [(vsm["vocab"][t], w) for t, w in zip(row.indices, row.data.tolist())]
+    return sorted(weighted, key=lambda x:x[1], reverse=True)[:top_n]
 
 
 # ==========================================================
@@ -131,8 +213,8 @@ def explain_terms(doc, vsm, wm, top_n=3):
 #  - AND  → irisan dokumen
 #  - OR   → gabungan dokumen
 #  - NOT  → komplemen dokumen
-def search_boolean(query, inverted_index):
-    return eval_boolean(query, inverted_index)
+def search_boolean(query, inverted_index, doc_ids):
+    return eval_boolean(query, inverted_index, doc_ids)
 
 
 # ==========================================================
@@ -145,24 +227,22 @@ def search_boolean(query, inverted_index):
 #  - MAP@k         : mean average precision
 #  - nDCG@k        : normalized discounted cumulative gain
 def evaluate_vsm(results, gold_set, k=5):
-    r = [doc for doc,_ in results[:k]]
-    hits = [1 if doc in gold_set else 0 for doc in r]
-
-    precision = sum(hits)/k
-    recall = sum(hits)/len(gold_set) if gold_set else 0
+    # Semua metrik dihitung dari satu array hits (0/1) dengan operasi NumPy
+    n = min(k, len(results))
+    hits = np.fromiter((doc in gold_set for doc,_ in results[:k]), dtype=np.int8, count=n)
+    positions = np.arange(1, n+1)
+    n_hits = int(hits.sum())
+    n_gold = len(gold_set)
+
+    precision = n_hits/k
+    recall = n_hits/n_gold if gold_set else 0
     f1 = 2*precision*recall/(precision+recall) if (precision+recall)>0 else 0
 
-    ap = 0
-    num_hits = 0
-    for i, h in enumerate(hits,1):
-        if h==1:
-            num_hits+=1
-            ap += num_hits/i
-    ap = ap/len(gold_set) if gold_set else 0
-
-    dcg = sum(h/math.log2(i+1) for i,h in enumerate(hits,start=1))
-    ideal_hits = min(len(gold_set),k)
-    idcg = sum(1/math.log2(i+1) for i in range(1,ideal_hits+1))
+    ap = float((np.cumsum(hits)/positions * hits).sum())/n_gold if gold_set else 0
+
+    discounts = 1/np.log2(np.arange(2, k+2))
+    dcg = float(hits @ discounts[:n])
+    idcg = float(discounts[:min(n_gold,k)].sum())
     ndcg = dcg/idcg if idcg>0 else 0
 
     return round(precision,2), round(recall,2), round(f1,2), round(ap,2), round(ndcg,2)
@@ -186,6 +266,7 @@ if __name__=="__main__":
         exit("Folder data/processed kosong!")
 
     # --- Bangun index dan model
+    doc_ids = list(docs.keys())
     inverted = build_inverted_index(docs)
     vsm = build_vsm(docs)
     wm_std = weight_tfidf_standard(vsm)
@@ -194,11 +275,14 @@ if __name__=="__main__":
     # ==========================================================
     # === [A] UJI DENGAN MODEL VSM (TF-IDF)
     # ==========================================================
+    # Teks tiap dokumen digabung & di-lowercase sekali untuk semua gold set
+    doc_text_lc = {f: " ".join(toks).lower() for f, toks in docs.items()}
+
     vsm_queries = ["universitas", "fakultas teknik", "bandung"]
     vsm_gold_sets = {
-        "universitas": set(f for f in docs if "universitas" in " ".join(docs[f]).lower()),
-        "fakultas teknik": set(f for f in docs if "fakultas" in " ".join(docs[f]).lower() and "teknik" in " ".join(docs[f]).lower()),
-        "bandung": set(f for f in docs if "bandung" in " ".join(docs[f]).lower()),
+        "universitas": set(f for f in docs if "universitas" in doc_text_lc[f]),
+        "fakultas teknik": set(f for f in docs if "fakultas" in doc_text_lc[f] and "teknik" in doc_text_lc[f]),
+        "bandung": set(f for f in docs if "bandung" in doc_text_lc[f]),
     }
 
     for q in vsm_queries:
@@ -234,15 +318,15 @@ if __name__=="__main__":
         "universitas OR bandung"
     ]
     boolean_gold_sets = {
-        "universitas AND fakultas": set(f for f in docs if "universitas" in " ".join(docs[f]).lower() and "fakultas" in " ".join(docs[f]).lower()),
-        "fakultas AND teknik": set(f for f in docs if "fakultas" in " ".join(docs[f]).lower() and "teknik" in " ".join(docs[f]).lower()),
-        "NOT bandung": set(docs.keys()) - set(f for f in docs if "bandung" in " ".join(docs[f]).lower()),
-        "universitas OR bandung": set(f for f in docs if "universitas" in " ".join(docs[f]).lower() or "bandung" in " ".join(docs[f]).lower())
+        "universitas AND fakultas": set(f for f in docs if "universitas" in doc_text_lc[f] and "fakultas" in doc_text_lc[f]),
+        "fakultas AND teknik": set(f for f in docs if "fakultas" in doc_text_lc[f] and "teknik" in doc_text_lc[f]),
+        "NOT bandung": set(docs.keys()) - set(f for f in docs if "bandung" in doc_text_lc[f]),
+        "universitas OR bandung": set(f for f in docs if "universitas" in doc_text_lc[f] or "bandung" in doc_text_lc[f])
     }
 
     for q in boolean_queries:
         print(f"\n=== Boolean Query: {q} ===")
-        bool_res = search_boolean(q, inverted)
+        bool_res = search_boolean(q, inverted, doc_ids)
         if bool_res:
             bool_table = [[i+1, doc, snippet(docs[doc])] for i,doc in enumerate(sorted(bool_res))]
             print(tabulate(bool_table, headers=["No","Doc ID","Snippet"], tablefmt="grid"))
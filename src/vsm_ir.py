@@ -1,11 +1,43 @@
 import os
-import math
 import re
-from collections import Counter, defaultdict
-from scipy.sparse import csr_matrix
-from numpy.linalg import norm
+import json
+import hashlib
+import importlib.util
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from scipy.sparse import csr_matrix, vstack, load_npz, save_npz
 from tabulate import tabulate
 
+# SimSIMD bersifat opsional: jika terpasang, skor cosine untuk matriks yang
+# cukup padat dihitung dengan kernel SIMD (AVX2/AVX-512/NEON) pada matriks
+# dense float32. Jika tidak ada, dipakai jalur sparse SciPy/NumPy biasa.
+try:
+    import simsimd
+except ImportError:
+    simsimd = None
+
+# Numba juga opsional: dipakai untuk kernel cosine CSR yang dikompilasi
+# (paralel per dokumen) pada korpus besar. Di sini hanya dicek keberadaannya;
+# modulnya (impor ~0,2 detik) baru dimuat saat kernel pertama kali dibutuhkan.
+_HAS_NUMBA = importlib.util.find_spec("numba") is not None
+
+# Kepadatan minimum (nnz / (N*V)) agar matriks layak diubah ke bentuk dense
+DENSE_MIN_DENSITY = 0.05
+# Jumlah dokumen minimum agar scoring dijalankan paralel (kernel Numba atau
+# beberapa thread); di bawahnya satu perkalian sparse SciPy lebih cepat
+PARALLEL_MIN_DOCS = 20_000
+# Jumlah file minimum agar dokumen dibaca dengan thread pool; di bawahnya
+# biaya membuat thread lebih besar daripada waktu baca file
+PARALLEL_MIN_FILES = 256
+# Versi format cache TF-IDF; naikkan setiap kali isi/rumus build_tfidf_schemes
+# berubah (IDF, dtype, normalisasi TF) agar cache lama tidak terpakai lagi
+TFIDF_CACHE_VERSION = 1
+# Folder cache di root repo (sejajar dengan data/), tidak bergantung pada direktori kerja
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache")
+# Pola token query, dikompilasi sekali saat modul dimuat
+_TOKEN_RE = re.compile(r"\b\w+\b")
+
 
 # =============================================================================
 # === [1] LOAD DOKUMEN PROSES (HASIL PREPROCESSING) ===
@@ -21,14 +53,24 @@ def load_processed_docs(path="data/processed"):
     Returns:
         dict: {nama_file: [token1, token2, ...]}
     """
-    docs = {}
-    for filename in os.listdir(path):
-        if filename.endswith(".txt"):
-            with open(os.path.join(path, filename), "r", encoding="utf-8") as f:
-                docs[filename] = f.read().split()
+    # os.scandir: iterasi langsung atas entri folder tanpa membangun list nama file
+    with os.scandir(path) as it:
+        entries = [(e.name, e.path) for e in it if e.name.endswith(".txt") and e.is_file()]
+
+    if len(entries) < PARALLEL_MIN_FILES:
+        return {name: _read_tokens(p) for name, p in entries}
+
+    # Korpus besar: baca file secara paralel (I/O melepas GIL); urutan hasil tetap mengikuti entries
+    with ThreadPoolExecutor() as ex:
+        docs = dict(zip((name for name, _ in entries), ex.map(_read_tokens, (p for _, p in entries))))
     return docs
 
 
+def _read_tokens(file_path):
+    with open(file_path, "r", encoding="utf-8") as f:
+        return f.read().split()
+
+
 # =============================================================================
 # === [2] PEMBANGUNAN MODEL TF-IDF ===
 # =============================================================================
@@ -42,47 +84,146 @@ def build_tfidf(docs, scheme="standard"):
         scheme (str): Pilihan skema TF ('standard' atau 'sublinear').
 
     Returns:
-        tuple: (doc_ids, vocab, tfidf_matrix, idf, term_index)
+        tuple: (doc_ids, vocab, tfidf_matrix, idf, term_index, doc_norms)
+            idf berupa array NumPy float32 yang diindeks sesuai term_index;
+            doc_norms adalah norma L2 tiap baris dokumen, dihitung sekali saat indexing.
+    """
+    doc_ids, vocab, matrices, idf, term_index, norms = build_tfidf_schemes(docs, schemes=(scheme,))
+    return doc_ids, vocab, matrices[scheme], idf, term_index, norms[scheme]
+
+
+def build_tfidf_schemes(docs, schemes=("standard", "sublinear")):
+    """
+    Membangun matriks TF-IDF untuk beberapa skema sekaligus dalam satu pass.
+    Vocabulary, frekuensi (doc, term), DF dan IDF sama untuk semua skema,
+    sehingga hanya dihitung sekali; yang berbeda hanya bobot TF-nya.
+
+    Args:
+        docs (dict): Kumpulan dokumen hasil tokenisasi.
+        schemes (tuple): Skema TF yang dibangun ('standard' dan/atau 'sublinear').
+
+    Returns:
+        tuple: (doc_ids, vocab, matrices, idf, term_index, doc_norms)
+            matrices dan doc_norms berupa dict {skema: nilai}.
     """
     doc_ids = list(docs.keys())
     N = len(doc_ids)
 
-    # --- Hitung Document Frequency (DF) dan Inverse Document Frequency (IDF)
-    df = defaultdict(int)
-    for tokens in docs.values():
-        for term in set(tokens):
-            df[term] += 1
-    idf = {t: math.log10(N / df[t]) for t in df}
-
     # --- Bentuk Vocabulary dan Indeks Term
-    vocab = sorted(idf.keys())
+    vocab = sorted(set().union(*docs.values()))
     term_index = {t: i for i, t in enumerate(vocab)}
+    V = len(vocab)
 
-    # --- Siapkan struktur sparse matrix untuk TF-IDF
-    rows, cols, values = [], [], []
+    # --- Ubah seluruh token menjadi pasangan (doc_id, term_id) dalam array NumPy
+    lengths = np.fromiter((len(docs[doc]) for doc in doc_ids), dtype=np.int64, count=N)
+    term_ids = np.fromiter((term_index[t] for doc in doc_ids for t in docs[doc]),
+                           dtype=np.int64, count=int(lengths.sum()))
+    doc_idx = np.repeat(np.arange(N, dtype=np.int64), lengths)
 
-    for d_i, doc in enumerate(doc_ids):
-        tf = Counter(docs[doc])
+    # --- Frekuensi tiap pasangan (doc, term) unik dengan satu panggilan np.unique
+    pair_keys, freqs = np.unique(doc_idx * V + term_ids, return_counts=True)
+    rows, cols = pair_keys // V, pair_keys % V
+
+    # --- Hitung Document Frequency (DF) dan Inverse Document Frequency (IDF)
+    df = np.bincount(cols, minlength=V)
+    idf = np.log10(N / df).astype(np.float32)
+    idf_cols = idf[cols]
 
-        if scheme == "standard":
-            max_tf = max(tf.values()) if tf else 1
-            # Normalisasi TF dan kalikan dengan IDF
-            for term, freq in tf.items():
-                rows.append(d_i)
-                cols.append(term_index[term])
-                values.append((freq / max_tf) * idf[term])
+    matrices, doc_norms = {}, {}
+    for scheme in schemes:
+        # --- Bobot TF sesuai skema, dihitung sekaligus untuk semua entri
+        if scheme == "sublinear":
+            # Gunakan skema logaritmik pada TF (satu pass np.log, +1 di tempat)
+            tf_w = np.log(freqs, dtype=np.float32)
+            tf_w += 1
+        else:
+            # Normalisasi TF dengan frekuensi maksimum di dokumennya
+            max_tf = np.zeros(N, dtype=np.float32)
+            np.maximum.at(max_tf, rows, freqs)
+            tf_w = freqs.astype(np.float32) / max_tf[rows]
+        tf_w *= idf_cols
 
-        elif scheme == "sublinear":
-            # Gunakan skema logaritmik pada TF
-            for term, freq in tf.items():
-                rows.append(d_i)
-                cols.append(term_index[term])
-                values.append((1 + math.log(freq)) * idf[term])
+        # --- Bentuk matriks sparse TF-IDF (float32: separuh bandwidth memori saat scoring)
+        matrices[scheme] = csr_matrix((tf_w, (rows, cols)), shape=(N, V), dtype=np.float32)
 
-    # --- Bentuk matriks sparse TF-IDF
-    tfidf_matrix = csr_matrix((values, (rows, cols)), shape=(len(doc_ids), len(vocab)))
+        # --- Norma L2 tiap dokumen (dipakai ulang oleh setiap query)
+        doc_norms[scheme] = doc_norms_of(matrices[scheme])
 
-    return doc_ids, vocab, tfidf_matrix, idf, term_index
+    return doc_ids, vocab, matrices, idf, term_index, doc_norms
+
+
+# =============================================================================
+# === [2B] CACHE MODEL TF-IDF DI DISK ===
+# =============================================================================
+def corpus_key(docs):
+    """
+    Menghitung sidik jari (SHA-1) korpus dari nama dokumen dan isi tokennya,
+    dipakai sebagai kunci cache model TF-IDF. TFIDF_CACHE_VERSION ikut di-hash,
+    sehingga cache dari versi rumus sebelumnya otomatis tidak cocok lagi.
+
+    Args:
+        docs (dict): Kumpulan dokumen hasil tokenisasi.
+
+    Returns:
+        str: Digest heksadesimal SHA-1.
+    """
+    h = hashlib.sha1(f"tfidf-cache-v{TFIDF_CACHE_VERSION}\n".encode("utf-8"))
+    for doc, tokens in docs.items():
+        h.update(doc.encode("utf-8") + b"\0" + " ".join(tokens).encode("utf-8") + b"\n")
+    return h.hexdigest()
+
+
+def build_tfidf_cached(docs, schemes=("standard", "sublinear"), cache_dir=CACHE_DIR):
+    """
+    Sama seperti `build_tfidf_schemes`, tetapi hasilnya disimpan di disk sehingga
+    pemanggilan berikutnya pada korpus yang sama tidak perlu membangun ulang.
+    Matriks tiap skema disimpan sebagai `{key}_{scheme}.npz` (scipy.sparse.save_npz),
+    sedangkan doc_ids, vocab dan idf (sama untuk semua skema) disimpan pada
+    file JSON pendamping `{key}.json`.
+
+    Args:
+        docs (dict): Kumpulan dokumen hasil tokenisasi.
+        schemes (tuple): Skema TF yang dibangun ('standard' dan/atau 'sublinear').
+        cache_dir (str): Folder penyimpanan cache (default: `cache/` di root repo).
+
+    Returns:
+        tuple: (doc_ids, vocab, matrices, idf, term_index, doc_norms),
+            sama dengan keluaran `build_tfidf_schemes`.
+    """
+    base = os.path.join(cache_dir, corpus_key(docs))
+    paths = {scheme: f"{base}_{scheme}.npz" for scheme in schemes}
+    if os.path.exists(base + ".json") and all(os.path.exists(p) for p in paths.values()):
+        try:
+            with open(base + ".json", "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            vocab = meta["vocab"]
+            term_index = {t: i for i, t in enumerate(vocab)}
+            idf = np.asarray(meta["idf"], dtype=np.float32)
+            matrices = {scheme: load_npz(p).tocsr() for scheme, p in paths.items()}
+            doc_norms = {scheme: doc_norms_of(m) for scheme, m in matrices.items()}
+            return meta["doc_ids"], vocab, matrices, idf, term_index, doc_norms
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            # File cache rusak/terpotong: anggap cache tidak ada dan bangun ulang
+            pass
+
+    result = build_tfidf_schemes(docs, schemes=schemes)
+    doc_ids, vocab, matrices, idf, _, _ = result
+    os.makedirs(cache_dir, exist_ok=True)
+    # Tulis ke file sementara lalu os.replace (atomik), JSON paling akhir:
+    # penulisan yang terputus tidak pernah meninggalkan cache yang tampak lengkap
+    for scheme, p in paths.items():
+        with open(_tmp_path(p), "wb") as f:
+            save_npz(f, matrices[scheme])
+        os.replace(_tmp_path(p), p)
+    with open(_tmp_path(base + ".json"), "w", encoding="utf-8") as f:
+        json.dump({"doc_ids": doc_ids, "vocab": vocab, "idf": idf.tolist()}, f)
+    os.replace(_tmp_path(base + ".json"), base + ".json")
+    return result
+
+
+def _tmp_path(path):
+    # Nama sementara per proses, agar dua proses yang menulis cache tidak bertabrakan
+    return f"{path}.{os.getpid()}.tmp"
 
 
 # =============================================================================
@@ -94,7 +235,7 @@ def vectorize_query(query, idf, term_index, vocab_size, scheme="standard"):
 
     Args:
         query (str): Query pencarian.
-        idf (dict): Nilai IDF untuk setiap term.
+        idf (ndarray): Nilai IDF tiap term, diindeks sesuai term_index.
         term_index (dict): Pemetaan term ke indeks kolom.
         vocab_size (int): Jumlah total term unik (ukuran vektor).
         scheme (str): Skema TF ('standard' atau 'sublinear').
@@ -103,47 +244,413 @@ def vectorize_query(query, idf, term_index, vocab_size, scheme="standard"):
         csr_matrix: Representasi vektor query.
         list: Token-token query.
     """
-    tokens = re.findall(r"\b\w+\b", query.lower())
-    tf = Counter(tokens)
-    rows, cols, values = [], [], []
-    max_tf = max(tf.values()) if tf else 1
+    tokens = _TOKEN_RE.findall(query.lower())
+    if not tokens:
+        return csr_matrix((1, vocab_size), dtype=np.float32), tokens
+
+    # Hitung TF dengan np.unique, lalu ambil ID term yang ada di vocab
+    uniq, counts = np.unique(tokens, return_counts=True)
+    max_tf = np.float32(counts.max())
+    known = np.fromiter((t in term_index for t in uniq), dtype=bool, count=uniq.size)
+    cols = np.fromiter((term_index[t] for t in uniq[known]), dtype=np.int64)
+    freqs = counts[known].astype(np.float32)
 
-    for term, freq in tf.items():
-        if term in term_index:
-            rows.append(0)
-            cols.append(term_index[term])
-            if scheme == "standard":
-                values.append((freq / max_tf) * idf[term])
-            elif scheme == "sublinear":
-                values.append((1 + math.log(freq)) * idf[term])
+    if scheme == "sublinear":
+        values = np.log(freqs)
+        values += 1
+    else:
+        values = freqs / max_tf
+    values *= idf[cols]
 
-    return csr_matrix((values, (rows, cols)), shape=(1, vocab_size)), tokens
+    return csr_matrix((values, (np.zeros_like(cols), cols)), shape=(1, vocab_size)), tokens
 
 
 # =============================================================================
 # === [4] COSINE SIMILARITY UNTUK PERINGKAT DOKUMEN ===
 # =============================================================================
-def cosine_similarity(q_vec, tfidf_matrix):
+def doc_norms_of(tfidf_matrix):
+    """
+    Mengambil norma L2 tiap dokumen. Nilainya dihitung sekali lalu disimpan
+    sebagai atribut pada matriks, sehingga query berikutnya tinggal memakainya.
+    (Jika isi matriks diubah di tempat, hapus atribut `_doc_norms` terlebih dulu.)
+
+    Args:
+        tfidf_matrix (csr_matrix): Matriks TF-IDF dokumen.
+
+    Returns:
+        ndarray: Norma L2 untuk setiap dokumen.
+    """
+    d_norms = getattr(tfidf_matrix, "_doc_norms", None)
+    if d_norms is None:
+        d_norms = np.sqrt(np.asarray(tfidf_matrix.multiply(tfidf_matrix).sum(axis=1)).ravel())
+        tfidf_matrix._doc_norms = d_norms
+    return d_norms
+
+
+def _is_dense_enough(tfidf_matrix):
+    """Cek apakah kepadatan matriks (nnz / (N*V)) mencapai DENSE_MIN_DENSITY."""
+    n_cells = tfidf_matrix.shape[0] * tfidf_matrix.shape[1]
+    return n_cells > 0 and tfidf_matrix.nnz / n_cells >= DENSE_MIN_DENSITY
+
+
+def dense_matrix_of(tfidf_matrix):
+    """
+    Mengambil salinan dense float32 (C-contiguous) dari matriks TF-IDF untuk
+    kernel SimSIMD. Disimpan sebagai atribut `_dense_f32` pada matriks
+    sehingga hanya dibuat sekali.
+
+    Args:
+        tfidf_matrix (csr_matrix): Matriks TF-IDF dokumen.
+
+    Returns:
+        ndarray: Matriks dense float32 berukuran (N, V).
+    """
+    dense = getattr(tfidf_matrix, "_dense_f32", None)
+    if dense is None:
+        dense = np.ascontiguousarray(tfidf_matrix.toarray(), dtype=np.float32)
+        tfidf_matrix._dense_f32 = dense
+    return dense
+
+
+def _dense_queries(q_matrix, dtype=np.float32):
+    """Mengubah tumpukan vektor query sparse (Q x V) menjadi array dense C-contiguous."""
+    return np.ascontiguousarray(q_matrix.toarray(), dtype=dtype)
+
+
+def cosine_similarity_dense(q_matrix, doc_dense, doc_norms):
+    """
+    Menghitung cosine similarity sekumpulan query terhadap matriks dokumen dense float32.
+    Memakai `simsimd.cdist(..., metric="cosine")` bila tersedia, atau
+    perkalian matriks NumPy sebagai cadangan.
+
+    Args:
+        q_matrix (csr_matrix): Tumpukan vektor query, satu baris per query.
+        doc_dense (ndarray): Matriks dokumen dense float32 (N, V).
+        doc_norms (ndarray): Norma L2 tiap dokumen.
+
+    Returns:
+        ndarray: Matriks skor (N x Q).
+    """
+    q = _dense_queries(q_matrix)
+    q_norms = np.linalg.norm(q, axis=1)
+
+    if simsimd is not None:
+        scores = 1.0 - np.asarray(simsimd.cdist(doc_dense, q, metric="cosine"), dtype=np.float64)
+    else:
+        denom = np.outer(doc_norms, q_norms)
+        dots = (doc_dense @ q.T).astype(np.float64)
+        scores = np.divide(dots, denom, out=np.zeros_like(dots), where=denom > 0)
+
+    # Dokumen atau query tanpa bobot (norma 0) selalu bernilai 0
+    return np.where(np.outer(doc_norms > 0, q_norms > 0), scores, 0.0)
+
+
+def quantize_int8(tfidf_matrix):
     """
-    Menghitung kemiripan kosinus antara query vector dan setiap dokumen.
+    Mengkuantisasi matriks TF-IDF menjadi matriks dense int8 dengan skala per baris
+    (nilai = d_i8 * scale). Kuantisasi dilakukan langsung dari array CSR, tanpa
+    salinan dense float32. Hasil disimpan sebagai atribut `_int8` pada matriks.
+    Hasilnya dense (N*V byte), sehingga hanya layak untuk matriks yang cukup
+    padat (lihat `_is_dense_enough`); `cosine_similarity_batch` memeriksanya.
+
+    Args:
+        tfidf_matrix (csr_matrix): Matriks TF-IDF dokumen.
+
+    Returns:
+        tuple: (d_i8, scales) — matriks int8 (N, V) dan skala float32 per dokumen.
+    """
+    cached = getattr(tfidf_matrix, "_int8", None)
+    if cached is None:
+        N, V = tfidf_matrix.shape
+        row_max = abs(tfidf_matrix).max(axis=1).toarray().ravel()
+        scales = np.where(row_max > 0, row_max / 127, 1).astype(np.float32)
+        rows = np.repeat(np.arange(N), np.diff(tfidf_matrix.indptr))
+        d_i8 = np.zeros((N, V), dtype=np.int8)
+        d_i8[rows, tfidf_matrix.indices] = np.round(tfidf_matrix.data / scales[rows])
+        cached = (d_i8, scales)
+        tfidf_matrix._int8 = cached
+    return cached
+
+
+def cosine_similarity_int8(q_matrix, d_i8, scales, doc_norms):
+    """
+    Menghitung cosine similarity dengan dot product int8 (VNNI lewat
+    `simsimd.cdist(..., metric="dot")`, atau NumPy int32 sebagai cadangan).
+    Query dikuantisasi dengan cara yang sama, lalu skor diskalakan kembali:
+    score = scale_d * scale_q * dot_i8 / (|d| * |q|).
+
+    Args:
+        q_matrix (csr_matrix): Tumpukan vektor query, satu baris per query.
+        d_i8 (ndarray): Matriks dokumen int8 (dari quantize_int8).
+        scales (ndarray): Skala per dokumen (dari quantize_int8).
+        doc_norms (ndarray): Norma L2 tiap dokumen.
+
+    Returns:
+        ndarray: Matriks skor cosine similarity (perkiraan), berukuran (N x Q).
+    """
+    q = _dense_queries(q_matrix)
+    q_norms = np.linalg.norm(q, axis=1)
+    q_max = np.abs(q).max(axis=1, initial=0)
+    q_scales = np.where(q_max > 0, q_max / 127, 1).astype(np.float32)
+    q_i8 = np.round(q / q_scales[:, None]).astype(np.int8)
+
+    if simsimd is not None:
+        raw = np.asarray(simsimd.cdist(d_i8, q_i8, metric="dot"), dtype=np.float64)
+    else:
+        raw = (d_i8.astype(np.int32) @ q_i8.astype(np.int32).T).astype(np.float64)
+
+    denom = np.outer(doc_norms, q_norms)
+    raw *= np.outer(scales, q_scales)
+    return np.divide(raw, denom, out=np.zeros_like(raw), where=denom > 0)
+
+
+def _cosine_csr_py(indptr, indices, data, doc_norms, q, q_norms):
+    # q berukuran (V, Q): satu penelusuran baris dokumen melayani semua query.
+    # Hanya dijalankan lewat _numba_kernel() (global `numba` diisi di sana).
+    n_docs, n_q = indptr.size - 1, q.shape[1]
+    out = np.zeros((n_docs, n_q))
+    for i in numba.prange(n_docs):
+        if doc_norms[i] > 0:
+            for k in range(indptr[i], indptr[i + 1]):
+                w = data[k]
+                for j in range(n_q):
+                    out[i, j] += w * q[indices[k], j]
+            for j in range(n_q):
+                if q_norms[j] > 0:
+                    out[i, j] /= doc_norms[i] * q_norms[j]
+    return out
+
+
+_cosine_csr_numba = None
+
+
+def _numba_kernel():
+    """Mengimpor Numba dan mengompilasi `_cosine_csr_py` saat pertama kali dibutuhkan."""
+    global numba, _cosine_csr_numba
+    if _cosine_csr_numba is None:
+        import numba
+        _cosine_csr_numba = numba.njit(parallel=True, fastmath=True, cache=True)(_cosine_csr_py)
+    return _cosine_csr_numba
+
+
+def cosine_similarity_batch(q_matrix, tfidf_matrix, doc_norms=None, use_int8=False, rows=None):
+    """
+    Menghitung cosine similarity untuk banyak query sekaligus.
+    Vektor query ditumpuk menjadi matriks (Q x V), lalu seluruh korpus cukup
+    ditelusuri satu kali. Kernel dipilih sebagai berikut:
+    - `cosine_similarity_int8` jika diminta (use_int8=True) dan matriks cukup
+      padat (>= DENSE_MIN_DENSITY); jika tidak, use_int8 diabaikan;
+    - `cosine_similarity_dense` (SimSIMD) jika terpasang dan matriks cukup
+      padat (>= DENSE_MIN_DENSITY);
+    - kernel Numba (`_numba_kernel`) bila tersedia dan korpus berisi
+      minimal PARALLEL_MIN_DOCS dokumen (biaya JIT/thread tidak sepadan di bawahnya);
+    - selain itu satu perkalian sparse SciPy `tfidf_matrix @ q_matrix.T`.
+
+    Args:
+        q_matrix (csr_matrix): Tumpukan vektor query, satu baris per query.
+        tfidf_matrix (csr_matrix): Matriks TF-IDF dokumen.
+        doc_norms (ndarray, optional): Norma L2 tiap dokumen; jika kosong
+            diambil dari `doc_norms_of(tfidf_matrix)`.
+        use_int8 (bool): Pakai `cosine_similarity_int8` (skor perkiraan; galat
+            kuantisasi absolut hingga orde 1e-2, terukur ~6e-3 pada korpus ini,
+            sehingga dokumen yang skornya berdekatan bisa bertukar urutan).
+        rows (tuple, optional): Rentang baris (start, end) yang dinilai; matriks
+            tidak disalin, cukup array CSR/dense/int8-nya yang diiris.
+
+    Returns:
+        ndarray: Matriks skor (N x Q), kolom ke-j untuk query ke-j.
+    """
+    if doc_norms is None:
+        doc_norms = doc_norms_of(tfidf_matrix)
+    start, end = rows if rows is not None else (0, tfidf_matrix.shape[0])
+    doc_norms = doc_norms[start:end]
+
+    # Jalur int8 hanya jika diminta pemanggil, karena skornya berupa perkiraan.
+    # Pada matriks jarang salinan int8 (N*V byte) jauh lebih besar dari CSR-nya,
+    # jadi permintaan itu diabaikan dan skor dihitung dengan jalur eksak di bawah.
+    if use_int8 and _is_dense_enough(tfidf_matrix):
+        d_i8, scales = quantize_int8(tfidf_matrix)
+        return cosine_similarity_int8(q_matrix, d_i8[start:end], scales[start:end], doc_norms)
+
+    # Jalur SIMD: hanya jika SimSIMD tersedia dan matriks cukup padat
+    if simsimd is not None and _is_dense_enough(tfidf_matrix):
+        return cosine_similarity_dense(q_matrix, dense_matrix_of(tfidf_matrix)[start:end], doc_norms)
+
+    q_norms = np.sqrt(np.asarray(q_matrix.multiply(q_matrix).sum(axis=1)).ravel())
+
+    # Jalur Numba: kernel CSR terkompilasi, paralel antar dokumen, hanya untuk
+    # korpus besar (indptr bernilai absolut, jadi irisan indptr saja sudah cukup)
+    if _HAS_NUMBA and tfidf_matrix.shape[0] >= PARALLEL_MIN_DOCS:
+        q = np.ascontiguousarray(q_matrix.T.toarray(), dtype=tfidf_matrix.dtype)
+        return _numba_kernel()(tfidf_matrix.indptr[start:end + 1], tfidf_matrix.indices,
+                                 tfidf_matrix.data, doc_norms, q, q_norms)
+
+    dots = (_row_view(tfidf_matrix, start, end) @ q_matrix.T).toarray()
+    denom = np.outer(doc_norms, q_norms)
+    return np.divide(dots, denom, out=np.zeros_like(dots), where=denom > 0)
+
+
+def cosine_similarity(q_vec, tfidf_matrix, doc_norms=None, use_int8=False, rows=None):
+    """
+    Menghitung kemiripan kosinus antara satu query vector dan setiap dokumen
+    (kasus satu kolom dari `cosine_similarity_batch`, dengan pemilihan kernel yang sama).
 
     Args:
         q_vec (csr_matrix): Vektor query.
         tfidf_matrix (csr_matrix): Matriks TF-IDF dokumen.
+        doc_norms (ndarray, optional): Norma L2 tiap dokumen.
+        use_int8 (bool): Pakai jalur int8 (lihat cosine_similarity_batch).
+        rows (tuple, optional): Rentang baris (start, end) yang dinilai.
+
+    Returns:
+        ndarray: Skor cosine similarity untuk setiap dokumen.
+    """
+    return cosine_similarity_batch(q_vec, tfidf_matrix, doc_norms, use_int8=use_int8, rows=rows)[:, 0]
+
+
+# =============================================================================
+# === [4B] PERINGKAT DOKUMEN (SPARSE MATRIX-VECTOR PRODUCT) ===
+# =============================================================================
+def _row_view(tfidf_matrix, start, end):
+    """
+    Mengiris baris [start, end) matriks CSR tanpa menyalin array data/indices
+    (berbeda dengan tfidf_matrix[start:end] yang membuat salinan).
+    """
+    if start == 0 and end == tfidf_matrix.shape[0]:
+        return tfidf_matrix
+    lo, hi = tfidf_matrix.indptr[start], tfidf_matrix.indptr[end]
+    # Array diisi langsung: konstruktor csr_matrix akan menyalin irisan yang
+    # jauh lebih kecil dari array induknya (prune)
+    view = csr_matrix((end - start, tfidf_matrix.shape[1]), dtype=tfidf_matrix.dtype)
+    view.data = tfidf_matrix.data[lo:hi]
+    view.indices = tfidf_matrix.indices[lo:hi]
+    view.indptr = tfidf_matrix.indptr[start:end + 1] - lo
+    return view
+
+
+def _shard_ranges(n_docs, n_shards):
+    """
+    Membagi baris dokumen menjadi `n_shards` rentang berurutan [(start, end), ...].
+    """
+    bounds = np.linspace(0, n_docs, n_shards + 1).astype(np.int64)
+    return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+
+def top_k_batch(scores, top_k=None):
+    """
+    Memilih indeks dokumen teratas untuk setiap kolom matriks skor batch
+    (keluaran `cosine_similarity_batch`). Seleksi dilakukan dengan
+    argpartition sepanjang axis 0, lalu hanya k baris teratas yang diurutkan.
+    Skor yang sama diurutkan menurut indeks dokumen.
+
+    Args:
+        scores (ndarray): Matriks skor (N x Q).
+        top_k (int | None): Jumlah hasil teratas per query (None = semua dokumen).
+
+    Returns:
+        ndarray: Indeks dokumen (k x Q), kolom ke-j terurut dari skor tertinggi.
+    """
+    N = scores.shape[0]
+    kk = N if top_k is None else min(top_k, N)
+    if kk < N:
+        idx = np.sort(np.argpartition(-scores, kk - 1, axis=0)[:kk], axis=0)
+    else:
+        idx = np.broadcast_to(np.arange(N)[:, None], scores.shape)
+    order = np.argsort(-np.take_along_axis(scores, idx, axis=0), axis=0, kind="stable")
+    return np.take_along_axis(idx, order, axis=0)
+
+
+def _top_k_shard(q_matrix, tfidf_matrix, doc_norms, start, end, top_k, use_int8=False):
+    """
+    Menghitung skor satu rentang baris dan mengembalikan top-k lokal tiap query
+    sebagai (indeks_global, skor), masing-masing berukuran (k x Q).
+    """
+    scores = cosine_similarity_batch(q_matrix, tfidf_matrix, doc_norms, use_int8=use_int8,
+                                     rows=(start, end))
+    idx = top_k_batch(scores, top_k)
+    return start + idx, np.take_along_axis(scores, idx, axis=0)
+
+
+def rank_vsm_batch(queries, doc_ids, tfidf_matrix, doc_norms, idf, term_index, scheme="standard",
+                   top_k=None, use_int8=False):
+    """
+    Meranking dokumen untuk beberapa query sekaligus dengan cosine similarity.
+    Vektor query ditumpuk menjadi satu matriks sehingga korpus hanya ditelusuri
+    sekali (lihat `cosine_similarity_batch`), memakai norma dokumen yang sudah
+    dihitung saat indexing. Untuk korpus besar (>= PARALLEL_MIN_DOCS) dan top_k
+    tertentu, dokumen dibagi menjadi shard yang dinilai paralel dengan ThreadPoolExecutor.
+
+    Args:
+        queries (list): Daftar query pencarian.
+        doc_ids (list): Nama dokumen sesuai urutan baris matriks.
+        tfidf_matrix (csr_matrix): Matriks TF-IDF dokumen.
+        doc_norms (ndarray): Norma L2 tiap dokumen (dari build_tfidf).
+        idf (ndarray): Nilai IDF tiap term, diindeks sesuai term_index.
+        term_index (dict): Pemetaan term ke indeks kolom.
+        scheme (str): Skema TF ('standard' atau 'sublinear').
+        top_k (int | None): Jumlah hasil teratas per query (None = semua dokumen).
+        use_int8 (bool): Skor dengan jalur int8 terkuantisasi (lihat cosine_similarity_batch).
 
     Returns:
-        list: Skor cosine similarity untuk setiap dokumen.
+        list: Satu ranking [(doc_id, skor_cosine), ...] per query, terurut dari skor tertinggi.
     """
-    scores = []
-    q_array = q_vec.toarray()
+    if not queries:
+        return []
+    V = tfidf_matrix.shape[1]
+    q_matrix = vstack([vectorize_query(q, idf, term_index, V, scheme=scheme)[0] for q in queries]).tocsr()
+
+    # Korpus besar: bagi dokumen ke beberapa shard, skor tiap shard di thread
+    # terpisah (SciPy/SimSIMD melepas GIL), lalu pilih ulang dari gabungan top-k lokalnya.
+    # Kernel Numba sudah paralel sendiri (prange), jadi tidak di-shard lagi.
+    n_workers = os.cpu_count() or 1
+    if (top_k is not None and n_workers > 1 and not _HAS_NUMBA
+            and tfidf_matrix.shape[0] >= PARALLEL_MIN_DOCS):
+        # Salinan dense/int8 dibangun sekali di thread utama; jika dibiarkan lazy,
+        # setiap worker membangun salinan N x V sendiri secara bersamaan
+        if _is_dense_enough(tfidf_matrix):
+            if use_int8:
+                quantize_int8(tfidf_matrix)
+            elif simsimd is not None:
+                dense_matrix_of(tfidf_matrix)
+        shards = _shard_ranges(tfidf_matrix.shape[0], n_workers)
+        with ThreadPoolExecutor(max_workers=n_workers) as ex:
+            local = list(ex.map(lambda sh: _top_k_shard(q_matrix, tfidf_matrix, doc_norms, *sh, top_k,
+                                                        use_int8), shards))
+        idx = np.concatenate([i for i, _ in local])
+        scores = np.concatenate([sc for _, sc in local])
+        best = top_k_batch(scores, top_k)
+        order = np.take_along_axis(idx, best, axis=0)
+        top_scores = np.take_along_axis(scores, best, axis=0)
+    else:
+        scores = cosine_similarity_batch(q_matrix, tfidf_matrix, doc_norms, use_int8=use_int8)
+        order = top_k_batch(scores, top_k)
+        top_scores = np.take_along_axis(scores, order, axis=0)
+
+    return [[(doc_ids[i], sc) for i, sc in zip(order[:, j], top_scores[:, j])]
+            for j in range(len(queries))]
+
+
+def rank_vsm(query, doc_ids, tfidf_matrix, doc_norms, idf, term_index, scheme="standard", top_k=None,
+             use_int8=False):
+    """
+    Meranking dokumen terhadap satu query (kasus satu query dari `rank_vsm_batch`).
 
-    for i in range(tfidf_matrix.shape[0]):
-        d_vec = tfidf_matrix.getrow(i).toarray()
-        denom = norm(q_array) * norm(d_vec)
-        score = (q_array @ d_vec.T)[0, 0] / denom if denom else 0.0
-        scores.append(score)
+    Args:
+        query (str): Query pencarian.
+        doc_ids (list): Nama dokumen sesuai urutan baris matriks.
+        tfidf_matrix (csr_matrix): Matriks TF-IDF dokumen.
+        doc_norms (ndarray): Norma L2 tiap dokumen (dari build_tfidf).
+        idf (ndarray): Nilai IDF tiap term, diindeks sesuai term_index.
+        term_index (dict): Pemetaan term ke indeks kolom.
+        scheme (str): Skema TF ('standard' atau 'sublinear').
+        top_k (int | None): Jumlah hasil teratas (None = semua dokumen).
+        use_int8 (bool): Skor dengan jalur int8 terkuantisasi.
 
-    return scores
+    Returns:
+        list: [(doc_id, skor_cosine), ...] terurut dari skor tertinggi.
+    """
+    return rank_vsm_batch([query], doc_ids, tfidf_matrix, doc_norms, idf, term_index, scheme=scheme,
+                          top_k=top_k, use_int8=use_int8)[0]
 
 
 # =============================================================================
@@ -174,9 +681,10 @@ if __name__ == "__main__":
         exit("Folder data/processed kosong.")
     print(f"Dokumen terbaca: {len(docs)}")
 
-    # --- Bangun model TF-IDF standard dan sublinear
-    doc_ids, vocab, tfidf_std, idf, term_index = build_tfidf(docs, scheme="standard")
-    _, _, tfidf_sub, _, _ = build_tfidf(docs, scheme="sublinear")
+    # --- Bangun (atau muat dari cache) model TF-IDF standard dan sublinear dalam satu pass
+    doc_ids, vocab, matrices, idf, term_index, norms = build_tfidf_cached(docs)
+    tfidf_std, tfidf_sub = matrices["standard"], matrices["sublinear"]
+    norms_std, norms_sub = norms["standard"], norms["sublinear"]
 
     # --- Daftar query uji dan gold set (dokumen relevan)
     queries = ["universitas", "fasilitas", "fakultas teknik"]
@@ -186,21 +694,14 @@ if __name__ == "__main__":
         "fakultas teknik": set(f for f in doc_ids if "itb" in f or "ui" in f),
     }
 
-    # --- Jalankan pencarian untuk setiap query
-    for q in queries:
-        print(f"\n=== QUERY: {q} ===")
-
-        # Vectorisasi query
-        q_vec_std, _ = vectorize_query(q, idf, term_index, len(vocab), scheme="standard")
-        q_vec_sub, _ = vectorize_query(q, idf, term_index, len(vocab), scheme="sublinear")
+    # --- Ranking semua query sekaligus per skema: korpus ditelusuri sekali
+    #     untuk seluruh query (matriks skor N x Q), bukan sekali per query
+    rankings_std = rank_vsm_batch(queries, doc_ids, tfidf_std, norms_std, idf, term_index, scheme="standard")
+    rankings_sub = rank_vsm_batch(queries, doc_ids, tfidf_sub, norms_sub, idf, term_index, scheme="sublinear")
 
-        # Hitung skor cosine similarity
-        scores_std = cosine_similarity(q_vec_std, tfidf_std)
-        scores_sub = cosine_similarity(q_vec_sub, tfidf_sub)
-
-        # Urutkan hasil (ranking)
-        ranking_std = sorted(zip(doc_ids, scores_std), key=lambda x: x[1], reverse=True)
-        ranking_sub = sorted(zip(doc_ids, scores_sub), key=lambda x: x[1], reverse=True)
+    # --- Tampilkan ranking untuk setiap query
+    for q, ranking_std, ranking_sub in zip(queries, rankings_std, rankings_sub):
+        print(f"\n=== QUERY: {q} ===")
 
         # Tampilkan hasil dalam bentuk tabel
         table_std = [[i+1, doc, f"{score:.4f}", get_snippet(docs[doc])]